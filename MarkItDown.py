@@ -7,10 +7,32 @@ import tempfile
 import shutil
 import subprocess
 import argparse
+import atexit
 import base64
+import contextlib
+import hashlib
+import importlib.metadata
 import io
+import logging
+import random
+import re
 import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from itertools import repeat
+
+# Progress and error messages; worker threads log whole lines, so messages
+# from parallel conversions never interleave mid-line
+logger = logging.getLogger("MarkItDown")
+
+try:
+    from markitdown import MarkItDown
+    MARKITDOWN_AVAILABLE = True
+except ImportError:
+    MARKITDOWN_AVAILABLE = False
 
 # Optional imports for OCR
 try:
@@ -20,11 +42,20 @@ except ImportError:
     DOTENV_AVAILABLE = False
 
 try:
-    from openai import OpenAI, AsyncOpenAI
+    import openai
+    from openai import AsyncOpenAI
+    import httpx  # installed with openai
     OPENAI_AVAILABLE = True
 except ImportError:
     OPENAI_AVAILABLE = False
 
+# HTTP/2 needs the optional h2 package (pip install httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 try:
     from pdf2image import convert_from_path
     from PIL import Image
@@ -32,6 +63,44 @@ try:
 except ImportError:
     PDF2IMAGE_AVAILABLE = False
 
+# Reads the PDF text layer to skip OCR for digital PDFs when enabled
+try:
+    import pypdfium2 as pdfium
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+# Faster event loop for the OCR request fan-out (not available on Windows)
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = hasattr(uvloop, "run")  # uvloop.run needs uvloop >= 0.18
+except ImportError:
+    UVLOOP_AVAILABLE = False
+
+# Faster JPEG encoder for page images when available
+try:
+    import numpy as np
+    import simplejpeg
+    SIMPLEJPEG_AVAILABLE = True
+except ImportError:
+    SIMPLEJPEG_AVAILABLE = False
+
+# Faster page hashing for the OCR page cache when available
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+# SIMD-accelerated base64 for page images when available
+try:
+    import pybase64
+    PYBASE64_AVAILABLE = True
+except ImportError:
+    PYBASE64_AVAILABLE = False
+
+b64encode = pybase64.b64encode if PYBASE64_AVAILABLE else base64.b64encode
+
 # Load environment variables
 if DOTENV_AVAILABLE:
     load_dotenv()
@@ -47,10 +116,38 @@ API_KEYS = [k for k in [DEEPINFRA_API_KEY, DEEPINFRA_API_KEY_2] if k]
 
 # OCR settings optimized for annual reports and financial documents
 OCR_DPI = int(os.getenv("OCR_DPI", "200"))  # Higher DPI for better text clarity
-OCR_IMAGE_FORMAT = os.getenv("OCR_IMAGE_FORMAT", "PNG")  # PNG for lossless quality
+OCR_IMAGE_FORMAT = os.getenv("OCR_IMAGE_FORMAT", "PNG").upper()  # PNG for lossless quality; JPEG or WEBP for smaller uploads
+# Quality for lossy page formats (JPEG rendering, JPEG/WEBP encoding)
+OCR_JPEG_QUALITY = int(os.getenv("OCR_JPEG_QUALITY", "95"))
+# zlib level for PNG re-encodes (1 = fastest; PNG stays lossless at any level)
+OCR_PNG_COMPRESS_LEVEL = int(os.getenv("OCR_PNG_COMPRESS_LEVEL", "1"))
+# Cap on the longest page edge in pixels; larger pages are downscaled before upload (0 = off)
+OCR_MAX_EDGE = int(os.getenv("OCR_MAX_EDGE", "0"))
 # With multiple API keys, we can use 100 concurrent per key (200 total for 2 keys)
 OCR_CONCURRENCY_PER_KEY = int(os.getenv("OCR_CONCURRENCY_PER_KEY", "100"))
 OCR_CONCURRENCY = OCR_CONCURRENCY_PER_KEY * len(API_KEYS) if API_KEYS else 50
+# PDFs whose text layer averages at least this many characters per page are
+# taken from the text layer instead of OCR (0 = always OCR; needs pypdfium2)
+OCR_TEXT_LAYER_THRESHOLD = int(os.getenv("OCR_TEXT_LAYER_THRESHOLD", "0"))
+# Retries per OCR request on rate limits, 5xx and connection errors, with
+# exponential backoff and jitter; a rate limit also halves that key's concurrency
+OCR_MAX_RETRIES = int(os.getenv("OCR_MAX_RETRIES", "5"))
+# Read OCR replies as a token stream instead of one response body
+OCR_STREAM = os.getenv("OCR_STREAM", "false").lower() == "true"
+# Pages sent together in one OCR request (1 = one request per page)
+OCR_PAGE_BATCH = max(1, int(os.getenv("OCR_PAGE_BATCH", "1")))
+# Poppler processes used to rasterize each batch of pages (leaves a core for the rest)
+OCR_RASTER_THREADS = int(os.getenv("OCR_RASTER_THREADS", "0")) or max(1, (os.cpu_count() or 2) - 1)
+# Pages rendered per batch, split across the Poppler processes; every process
+# re-parses the whole PDF, so batches stay large (0 = 25 pages per process)
+OCR_RENDER_BATCH = int(os.getenv("OCR_RENDER_BATCH", "0")) or 25 * OCR_RASTER_THREADS
+# Rasterize with pdftocairo instead of pdftoppm
+OCR_USE_PDFTOCAIRO = os.getenv("OCR_USE_PDFTOCAIRO", "false").lower() == "true"
+# PDFs OCR'd at the same time; each already keeps OCR_CONCURRENCY requests in flight
+OCR_PARALLEL_PDFS = max(1, int(os.getenv("OCR_PARALLEL_PDFS", "2")))
+
+# Pass 1 stops once this many leading pages come back without a TOC
+TOC_EARLY_EXIT_PAGES = 3
 
 # Prompt for extracting table of contents structure
 TOC_EXTRACTION_PROMPT = """Look at this page. Does it show a TABLE OF CONTENTS with chapter names and page numbers?
@@ -130,181 +227,601 @@ OCR_MAX_TOKENS = int(os.getenv("OCR_MAX_TOKENS", "0")) or ACTIVE_OCR_CONFIG["def
 # Global flag to disable OCR (set via CLI)
 DISABLE_OCR = False
 
+# Conversion cache, keyed by content hash (disable via --no-cache).
+# CACHE_DIR is set by process_all_files to a folder inside the output directory.
+USE_CACHE = True
+CACHE_DIR = None
+
+# Number of files converted in parallel within a folder or ZIP archive
+CONVERT_WORKERS = int(os.getenv("CONVERT_WORKERS", "0")) or os.cpu_count() or 1
+
+# File types that are converted; anything else (.DS_Store, Thumbs.db, binaries, ...)
+# is skipped up front instead of failing inside markitdown
+SUPPORTED_EXTENSIONS = frozenset({
+    ".pdf", ".docx", ".pptx", ".xlsx", ".xls", ".html", ".htm", ".csv", ".json", ".xml",
+    ".md", ".txt", ".zip", ".epub", ".ipynb", ".msg", ".mp3", ".wav", ".m4a",
+    ".jpg", ".jpeg", ".png",
+})
+
+# Reconvert files whose output already exists (set via --force)
+FORCE = False
+
+# Write buffer for output files
+OUTPUT_BUFFER_SIZE = 1 << 20
 
+# Outputs get the usual umask-derived mode rather than mkstemp's 0600
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# Shared in-process MarkItDown converter (created on first use)
+_MD = None
+_MD_LOCK = threading.Lock()
+
+# Relative input/output paths are resolved against the script's directory
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# Reasons OCR can be off, checked in order; the first that applies is reported
+OCR_UNAVAILABLE_REASONS = [
+    (lambda: DISABLE_OCR, "disabled via --no-ocr"),
+    (lambda: not USE_OCR, "USE_OLMOCR=false in .env"),
+    (lambda: not DEEPINFRA_API_KEY, "DEEPINFRA_API_KEY not set"),
+    (lambda: not OPENAI_AVAILABLE, "openai package not installed"),
+    (lambda: not PDF2IMAGE_AVAILABLE, "pdf2image/Pillow not installed"),
+]
+
+
+def get_ocr_unavailable_reason():
+    """Return why OCR cannot be used, or None if it is available and configured"""
+    return next((reason for check, reason in OCR_UNAVAILABLE_REASONS if check()), None)
+
+
+@functools.lru_cache(maxsize=1)
 def is_ocr_available():
-    """Check if OCR via DeepInfra is available and configured"""
-    if DISABLE_OCR:
-        return False
-    if not USE_OCR:
-        return False
-    if not DEEPINFRA_API_KEY:
-        return False
-    if not OPENAI_AVAILABLE:
-        return False
-    if not PDF2IMAGE_AVAILABLE:
-        return False
-    return True
+    """Check if OCR via DeepInfra is available and configured.
+
+    Asked for every PDF; cached, as its inputs are fixed once the CLI
+    flags are applied at startup.
+    """
+    return get_ocr_unavailable_reason() is None
 
 
-def get_deepinfra_client():
-    """Create an OpenAI-compatible client for DeepInfra"""
-    return OpenAI(
-        api_key=DEEPINFRA_API_KEY,
-        base_url=DEEPINFRA_BASE_URL,
-    )
+def get_markitdown():
+    """Return the shared MarkItDown converter, creating it on first use"""
+    global _MD
+    if _MD is None:
+        # Worker threads can race here on the first files; build it only once
+        with _MD_LOCK:
+            if _MD is None:
+                _MD = MarkItDown()
+    return _MD
 
 
-def get_async_deepinfra_client():
-    """Create an async OpenAI-compatible client for DeepInfra"""
-    return AsyncOpenAI(
-        api_key=DEEPINFRA_API_KEY,
-        base_url=DEEPINFRA_BASE_URL,
+def get_async_http_client():
+    """Create the connection pool shared by the async clients of one PDF.
+
+    Sized for every concurrent request across all keys, with a long
+    keep-alive so connections survive the gaps between page batches.
+    Must be created inside the event loop that uses it.
+    """
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=OCR_CONCURRENCY + 20,
+            max_keepalive_connections=OCR_CONCURRENCY,
+            keepalive_expiry=60,
+        ),
+        timeout=httpx.Timeout(600.0, connect=5.0),  # openai's own default
     )
 
 
-def get_async_deepinfra_clients():
+def get_async_deepinfra_clients(http_client=None):
     """Create async clients for all available API keys"""
     return [
-        AsyncOpenAI(api_key=key, base_url=DEEPINFRA_BASE_URL)
+        # Retries are done by send_ocr_request so rate limits can slow the key down
+        AsyncOpenAI(api_key=key, base_url=DEEPINFRA_BASE_URL, max_retries=0,
+                    http_client=http_client)
         for key in API_KEYS
     ]
 
 
-def image_to_base64(image, format=None, quality=95):
-    """Convert a PIL Image to base64 string"""
+# MIME type and file extensions for each supported OCR image format
+IMAGE_MIME_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+IMAGE_FORMAT_EXTENSIONS = {"PNG": (".png",), "JPEG": (".jpg", ".jpeg"), "WEBP": (".webp",)}
+
+# Poppler cannot write WebP, so those pages are rendered as PNG and re-encoded
+RASTER_FORMAT = "jpeg" if OCR_IMAGE_FORMAT == "JPEG" else "png"
+
+# Threads that encode page images, shared by every PDF and event loop so they
+# are started once per run; pdftoppm waits stay on the loop's default executor
+ENCODE_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="ocr-encode")
+atexit.register(ENCODE_POOL.shutdown, wait=False)
+
+
+def image_fits_max_edge(path):
+    """Check a page image file against OCR_MAX_EDGE (reads only the image header)"""
+    if not OCR_MAX_EDGE:
+        return True
+    with Image.open(path) as image:
+        return max(image.size) <= OCR_MAX_EDGE
+
+
+# Image modes with an alpha channel, which image_to_base64 flattens to RGB
+ALPHA_MODES = frozenset({"RGBA", "LA", "PA", "RGBa", "La"})
+
+# Modes PIL can write as JPEG without converting
+JPEG_MODES = frozenset({"RGB", "L", "1", "CMYK"})
+
+def image_to_base64(image, format=None, quality=None):
+    """Convert a PIL Image or an image file to base64 string"""
     if format is None:
         format = OCR_IMAGE_FORMAT
-    buffer = io.BytesIO()
-    if format == "JPEG" and image.mode == "RGBA":
+    if quality is None:
+        quality = OCR_JPEG_QUALITY
+    if isinstance(image, (str, os.PathLike)):
+        # A file already in the wire format is sent as-is, skipping a decode/re-encode
+        if (os.path.splitext(image)[1].lower() in IMAGE_FORMAT_EXTENSIONS.get(format, ())
+                and image_fits_max_edge(image)):
+            with open(image, "rb") as f:
+                return b64encode(f.read()).decode("utf-8")
+        # Close the file before returning: page files are deleted right after
+        with Image.open(image) as opened:
+            return _encode_image(opened, format, quality)
+    return _encode_image(image, format, quality)
+
+
+def _encode_image(image, format, quality):
+    """Encode a PIL Image in the wire format and return it as a base64 string"""
+    if OCR_MAX_EDGE and max(image.size) > OCR_MAX_EDGE:
+        image = image.copy()
+        image.thumbnail((OCR_MAX_EDGE, OCR_MAX_EDGE), Image.LANCZOS)
+    # Pages have no transparency; an alpha channel only adds bytes. Grayscale,
+    # bilevel and palette images stay as they are, which keeps them small
+    if image.mode in ALPHA_MODES or (image.mode == "P" and "transparency" in image.info):
         image = image.convert("RGB")
+    if format == "JPEG" and SIMPLEJPEG_AVAILABLE:
+        if image.mode == "L":
+            pixels, colorspace = np.asarray(image)[:, :, None], "GRAY"
+        else:
+            pixels, colorspace = np.asarray(image if image.mode == "RGB" else image.convert("RGB")), "RGB"
+        jpeg = simplejpeg.encode_jpeg(np.ascontiguousarray(pixels), quality=quality, colorspace=colorspace)
+        return b64encode(jpeg).decode("utf-8")
+    buffer = io.BytesIO()
     if format == "PNG":
-        image.save(buffer, format=format, optimize=True)
+        image.save(buffer, format=format, compress_level=OCR_PNG_COMPRESS_LEVEL)
     else:
+        # JPEG has no palette mode
+        if format == "JPEG" and image.mode not in JPEG_MODES:
+            image = image.convert("RGB")
         image.save(buffer, format=format, quality=quality)
-    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+    return b64encode(buffer.getvalue()).decode("utf-8")
 
 
-def convert_pdf_page_with_ocr(client, image, page_num, verbose=False):
-    """Convert a single PDF page image to markdown using active OCR model (sync version)"""
-    try:
-        base64_image = image_to_base64(image)
-        mime_type = "image/png" if OCR_IMAGE_FORMAT == "PNG" else "image/jpeg"
+def image_to_data_url(image):
+    """Encode a page image as the data: URL sent to the OCR model.
+
+    Built once per page in the encoding thread; requests, retries and
+    the page cache all reuse the same string.
+    """
+    return f"data:{IMAGE_MIME_TYPES[OCR_IMAGE_FORMAT]};base64,{image_to_base64(image)}"
+
+
+@functools.lru_cache(maxsize=16)
+def get_text_part(prompt):
+    """Return the message part for a prompt, shared by every request that uses it.
+
+    Only a handful of distinct prompts exist per run, so the dict is built
+    once per prompt; the SDK serializes it without modifying it.
+    """
+    return {"type": "text", "text": prompt}
+
+
+def get_ocr_page_cache_path(image_url, prompt):
+    """Return the cache file for one OCR'd page image, or None when caching is off.
+
+    Keyed by the model, token limit, prompt and encoded image, so a rerun
+    after a partial failure only sends the pages that did not come back.
+    """
+    if not USE_CACHE or not CACHE_DIR:
+        return None
+    hasher = blake3.blake3() if BLAKE3_AVAILABLE else hashlib.blake2b(digest_size=16)
+    hasher.update(f"{ACTIVE_OCR_CONFIG['model_id']}\0{OCR_MAX_TOKENS}\0{prompt}\0".encode("utf-8"))
+    # Hashed separately so the multi-MB image is not copied into a joined string
+    hasher.update(image_url.encode("ascii"))
+    key = hasher.hexdigest()[:32]
+    return os.path.join(CACHE_DIR, "ocr", f"{key}.md")
+
+
+class AdmissionController:
+    """Limit on in-flight OCR requests that can be resized while requests run.
+
+    Used like asyncio.Semaphore (``async with admission:``), but the limit
+    is a plain counter guarded by an asyncio.Condition, so resize() can
+    lower or raise it at any time without touching Semaphore internals.
+    Must be created inside the event loop that uses it.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.max_limit = limit
+        self.active = 0
+        self.waiting = 0
+        self.condition = asyncio.Condition()
+        self.shrunk_at = 0.0
+
+    @property
+    def load(self):
+        """Requests running or queued on this controller"""
+        return self.active + self.waiting
+
+    async def acquire(self):
+        async with self.condition:
+            self.waiting += 1
+            try:
+                await self.condition.wait_for(lambda: self.active < self.limit)
+            except asyncio.CancelledError:
+                # Before Python 3.13 a waiter cancelled after being notified
+                # swallows the wakeup (e.g. TOC pages cut short by the early
+                # exit); hand it on so a free slot is not left unused
+                self.condition.notify(1)
+                raise
+            finally:
+                self.waiting -= 1
+            self.active += 1
+
+    async def release(self):
+        async with self.condition:
+            self.active -= 1
+            self.condition.notify(1)
+
+    async def resize(self, limit):
+        async with self.condition:
+            self.limit = max(1, limit)
+            self.condition.notify_all()
 
-        response = client.chat.completions.create(
+    async def shrink(self):
+        """Halve the limit after a rate limit; a burst of 429s within a second counts once"""
+        now = time.monotonic()
+        if now - self.shrunk_at >= 1.0:
+            self.shrunk_at = now
+            await self.resize(self.limit // 2)
+
+    async def grow(self):
+        """Raise the limit by one after a success, back up to the initial limit"""
+        if self.limit < self.max_limit:
+            await self.resize(self.limit + 1)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.release()
+
+
+def pick_ocr_slot(slots):
+    """Return the least-loaded (client, admission) pair, one pair per API key.
+
+    Load is measured against each key's current limit, so a key slowed
+    down by rate limits gets proportionally fewer requests.
+    """
+    return min(slots, key=lambda slot: slot[1].load / slot[1].limit)
+
+
+async def request_ocr_completion(client, content, max_tokens):
+    """Send one OCR chat request with the given message content and return the reply text.
+
+    With OCR_STREAM the reply is read as a token stream, which keeps a
+    long page's connection active while it is generated and lets the
+    caller see failures mid-response rather than only at the end.
+    """
+    messages = [{"role": "user", "content": content}]
+    if not OCR_STREAM:
+        response = await client.chat.completions.create(
             model=ACTIVE_OCR_CONFIG["model_id"],
-            messages=[
+            messages=messages,
+            max_tokens=max_tokens,
+        )
+        return response.choices[0].message.content
+
+    stream = await client.chat.completions.create(
+        model=ACTIVE_OCR_CONFIG["model_id"],
+        messages=messages,
+        max_tokens=max_tokens,
+        stream=True,
+    )
+    parts = []
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+    return "".join(parts)
+
+
+def get_retry_delay(error, attempt):
+    """Return seconds to wait before retrying a failed OCR request, or None if it is not retryable.
+
+    Same errors as openai's built-in retries: timeouts, connection errors,
+    408, 409, 429 and 5xx. A Retry-After header from the server wins over
+    the exponential backoff.
+    """
+    if isinstance(error, openai.APIStatusError):
+        status = error.status_code
+        if status not in (408, 409, 429) and status < 500:
+            return None
+        try:
+            return min(float(error.response.headers.get("retry-after")), 60.0)
+        except (TypeError, ValueError):
+            pass
+    elif not isinstance(error, openai.APIConnectionError):
+        return None
+    return min(0.5 * 2 ** attempt, 30.0) * random.uniform(0.75, 1.25)
+
+
+async def send_ocr_request(slots, content, max_tokens):
+    """Send an OCR request to the least-loaded API key, retrying transient failures.
+
+    Each attempt picks a key again, so a retry can move to a key that is
+    not rate limited. A 429 shrinks the key's AdmissionController, and
+    each success grows it back, so the request rate settles just under
+    what the API accepts instead of failing through OCR_MAX_RETRIES.
+    """
+    for attempt in range(OCR_MAX_RETRIES + 1):
+        client, admission = pick_ocr_slot(slots)
+        try:
+            async with admission:
+                result = await request_ocr_completion(client, content, max_tokens)
+        except Exception as e:
+            delay = get_retry_delay(e, attempt)
+            if delay is None or attempt == OCR_MAX_RETRIES:
+                raise
+            if isinstance(e, openai.RateLimitError):
+                await admission.shrink()
+            await asyncio.sleep(delay)
+        else:
+            await admission.grow()
+            return result
+
+
+async def convert_pdf_page_with_ocr_async(slots, image_url, page_num, prompt=None, verbose=False):
+    """Convert a single PDF page image to markdown using active OCR model (async version).
+
+    slots holds one (client, AdmissionController) pair per API key; the
+    request goes to the least-loaded key.
+    """
+    ocr_prompt = prompt if prompt else ACTIVE_OCR_CONFIG["prompt"]
+    cache_path = get_ocr_page_cache_path(image_url, ocr_prompt)
+    content = read_cache(cache_path)
+    if content is not None:
+        if verbose:
+            logger.info("  Using cached OCR for page %s", page_num)
+        return (page_num, content)
+
+    try:
+        content = await send_ocr_request(
+            slots,
+            [
+                get_text_part(ocr_prompt),
                 {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": ACTIVE_OCR_CONFIG["prompt"]
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:{mime_type};base64,{base64_image}"
-                            }
-                        }
-                    ]
+                    "type": "image_url",
+                    "image_url": {
+                        "url": image_url
+                    }
                 }
             ],
-            max_tokens=OCR_MAX_TOKENS,
+            OCR_MAX_TOKENS,
         )
 
-        return response.choices[0].message.content
+        if verbose:
+            logger.info("  Completed page %s", page_num)
+
+        if cache_path and content:
+            write_cache(cache_path, content)
+        return (page_num, content)
     except Exception as e:
         if verbose:
-            print(f"Error processing page {page_num} with {ACTIVE_OCR_CONFIG['name']}: {str(e)}")
-        return None
+            logger.info("  Error on page %s: %s", page_num, e)
+        return (page_num, None)
+
+
+# Line the model is asked to put between pages of a multi-page request
+PAGE_BREAK_SENTINEL = "---PAGE_BREAK---"
 
 
-async def convert_pdf_page_with_ocr_async(client, base64_image, page_num, semaphore, prompt=None, verbose=False):
-    """Convert a single PDF page image to markdown using active OCR model (async version)"""
-    async with semaphore:
+async def convert_pdf_pages_with_ocr_async(slots, pages, prompt=None, verbose=False):
+    """Convert several (page_num, image_url) pages with one OCR request.
+
+    The model is asked to separate pages with PAGE_BREAK_SENTINEL; if the
+    reply does not split into one part per page, every page is converted
+    again on its own. Returns a list of (page_num, content) tuples.
+    """
+    ocr_prompt = prompt if prompt else ACTIVE_OCR_CONFIG["prompt"]
+
+    # Pages already in the cache are not sent again
+    results = {}
+    to_send = []
+    for page_num, image_url in pages:
+        content = read_cache(get_ocr_page_cache_path(image_url, ocr_prompt))
+        if content is not None:
+            if verbose:
+                logger.info("  Using cached OCR for page %s", page_num)
+            results[page_num] = content
+        else:
+            to_send.append((page_num, image_url))
+
+    if len(to_send) == 1:
+        page_num, content = await convert_pdf_page_with_ocr_async(
+            slots, to_send[0][1], to_send[0][0], prompt, verbose
+        )
+        results[page_num] = content
+    elif to_send:
+        first, last = to_send[0][0], to_send[-1][0]
+        batch_prompt = (
+            f"{ocr_prompt}\n\nThe {len(to_send)} images are consecutive pages. Convert each page "
+            f"separately, in order, and put a line containing only {PAGE_BREAK_SENTINEL} between pages."
+        )
+        parts = None
         try:
-            mime_type = "image/png" if OCR_IMAGE_FORMAT == "PNG" else "image/jpeg"
-            ocr_prompt = prompt if prompt else ACTIVE_OCR_CONFIG["prompt"]
-
-            response = await client.chat.completions.create(
-                model=ACTIVE_OCR_CONFIG["model_id"],
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": ocr_prompt
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:{mime_type};base64,{base64_image}"
-                                }
-                            }
-                        ]
-                    }
+            content = await send_ocr_request(
+                slots,
+                [
+                    get_text_part(batch_prompt),
+                    *[
+                        {"type": "image_url", "image_url": {"url": image_url}}
+                        for _, image_url in to_send
+                    ],
                 ],
-                max_tokens=OCR_MAX_TOKENS,
+                OCR_MAX_TOKENS * len(to_send),
             )
-
+            parts = [part.strip() for part in (content or "").split(PAGE_BREAK_SENTINEL)]
+        except Exception as e:
             if verbose:
-                print(f"  Completed page {page_num}", flush=True)
+                logger.info("  Error on pages %s-%s: %s", first, last, e)
 
-            return (page_num, response.choices[0].message.content)
-        except Exception as e:
+        if parts is not None and len(parts) == len(to_send):
             if verbose:
-                print(f"  Error on page {page_num}: {str(e)}", flush=True)
-            return (page_num, None)
+                logger.info("  Completed pages %s-%s", first, last)
+            for (page_num, image_url), content in zip(to_send, parts):
+                results[page_num] = content
+                cache_path = get_ocr_page_cache_path(image_url, ocr_prompt)
+                if cache_path and content:
+                    write_cache(cache_path, content)
+        else:
+            # Reply could not be split per page: fall back to one request per page
+            if verbose and parts is not None:
+                logger.info("  Pages %s-%s came back as %s parts, retrying one page at a time", first, last, len(parts))
+            for page_num, content in await asyncio.gather(*[
+                convert_pdf_page_with_ocr_async(slots, image_url, page_num, prompt, verbose)
+                for page_num, image_url in to_send
+            ]):
+                results[page_num] = content
+
+    return [(page_num, results[page_num]) for page_num, _ in pages]
+
+
+def rasterize_pdf_pages(pdf_path, first_page, last_page, output_folder):
+    """Render a page range to image files in output_folder, split across Poppler processes.
+
+    Returns the file paths, in page order; pages are written in
+    RASTER_FORMAT (OCR_IMAGE_FORMAT unless that is WEBP) so image_to_base64
+    can usually send them without re-encoding.
+    """
+    return convert_from_path(
+        pdf_path,
+        dpi=OCR_DPI,
+        first_page=first_page,
+        last_page=last_page,
+        thread_count=OCR_RASTER_THREADS,
+        output_folder=output_folder,
+        fmt=RASTER_FORMAT,
+        # Poppler defaults to quality 75; match what PIL used to encode
+        jpegopt={"quality": OCR_JPEG_QUALITY, "progressive": True, "optimize": True} if RASTER_FORMAT == "jpeg" else None,
+        paths_only=True,
+        use_pdftocairo=OCR_USE_PDFTOCAIRO,
+    )
+
+
+def extract_pdf_text_layer(pdf_path):
+    """Return the embedded text of every page of a PDF, or None if it cannot be read"""
+    try:
+        pdf = pdfium.PdfDocument(pdf_path)
+    except Exception:
+        return None
+    try:
+        texts = []
+        for page in pdf:
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+        return texts
+    except Exception:
+        return None
+    finally:
+        pdf.close()
+
+
+def join_page_contents(page_contents):
+    """Join per-page markdown (None for failed pages) in page order"""
+    total_pages = len(page_contents)
+    markdown_parts = []
+    for page_num, content in enumerate(page_contents, 1):
+        if content:
+            if total_pages > 1:
+                markdown_parts.append(f"<!-- Page {page_num} -->\n\n{content}")
+            else:
+                markdown_parts.append(content)
+        else:
+            markdown_parts.append(f"<!-- Page {page_num}: OCR failed -->")
+    return "\n\n---\n\n".join(markdown_parts)
 
 
 def get_pdf_page_count(pdf_path):
-    """Get the total number of pages in a PDF without loading all pages"""
+    """Get the total number of pages in a PDF without loading all pages.
+
+    Read in-process with pypdfium2 when installed, saving a pdfinfo
+    subprocess per PDF; pdfinfo is still used if pdfium cannot open it.
+    """
+    if PDFIUM_AVAILABLE:
+        try:
+            pdf = pdfium.PdfDocument(pdf_path)
+            try:
+                return len(pdf)
+            finally:
+                pdf.close()
+        except Exception:
+            pass
     from pdf2image.pdf2image import pdfinfo_from_path
     info = pdfinfo_from_path(pdf_path)
     return info["Pages"]
 
 
-def extract_toc_from_pages(client, images, verbose=False):
+async def extract_toc_from_pages(slots, images, verbose=False):
     """Extract table of contents from the first few pages of a PDF"""
-    toc_content = []
+    loop = asyncio.get_running_loop()
+    text_part = get_text_part(ACTIVE_OCR_CONFIG["toc_prompt"])
 
-    for i, image in enumerate(images):
-        page_num = i + 1
+    async def scan_page(page_num, image):
         try:
-            base64_image = image_to_base64(image)
-            mime_type = "image/png" if OCR_IMAGE_FORMAT == "PNG" else "image/jpeg"
-
-            response = client.chat.completions.create(
-                model=ACTIVE_OCR_CONFIG["model_id"],
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": ACTIVE_OCR_CONFIG["toc_prompt"]},
-                            {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{base64_image}"}}
-                        ]
-                    }
-                ],
-                max_tokens=2048,
-            )
+            image_url = await loop.run_in_executor(ENCODE_POOL, image_to_data_url, image)
+            content = [
+                text_part,
+                {"type": "image_url", "image_url": {"url": image_url}}
+            ]
+            result = await send_ocr_request(slots, content, 2048)
 
-            result = response.choices[0].message.content.strip()
             # Only include if it contains actual TOC markers (>>>)
             if result and ">>>" in result:
-                toc_content.append(result)
                 if verbose:
-                    print(f"  Found TOC structure on page {page_num}", flush=True)
-            elif verbose and "NOT_A_TOC" not in result.upper():
-                pass  # Silently skip non-TOC pages
-
+                    logger.info("  Found TOC structure on page %s", page_num)
+                return result.strip()
+            return ""
         except Exception as e:
             if verbose:
-                print(f"  Error extracting TOC from page {page_num}: {str(e)}", flush=True)
+                logger.info("  Error extracting TOC from page %s: %s", page_num, e)
+        return None
 
+    # Scan all pages at once, but give up on the rest as soon as the first
+    # TOC_EARLY_EXIT_PAGES pages have all come back without a TOC
+    tasks = [asyncio.ensure_future(scan_page(page_num, image)) for page_num, image in enumerate(images, 1)]
+    results = []
+    for task in tasks[:TOC_EARLY_EXIT_PAGES]:
+        results.append(await task)
+    if len(tasks) > TOC_EARLY_EXIT_PAGES and all(result == "" for result in results):
+        if verbose:
+            logger.info("  No TOC on the first %s pages, skipping the rest", TOC_EARLY_EXIT_PAGES)
+        for task in tasks[TOC_EARLY_EXIT_PAGES:]:
+            task.cancel()
+        await asyncio.gather(*tasks[TOC_EARLY_EXIT_PAGES:], return_exceptions=True)
+        return None
+    results += await asyncio.gather(*tasks[TOC_EARLY_EXIT_PAGES:])
+    toc_content = [result for result in results if result]
     return "\n".join(toc_content) if toc_content else None
 
 
+# A chapter line of the TOC reply; group 1 is the chapter name
+TOC_LINE_RE = re.compile(r"^\s*(?:>>>|MAIN_SECTION:|CHAPTER:)\s*(\S.*?)\s*$")
+
+
 def parse_toc_structure(toc_text):
     """Parse extracted TOC text into a hierarchical structure"""
     if not toc_text:
@@ -316,33 +833,19 @@ def parse_toc_structure(toc_text):
         "section_pages": {}  # Maps page numbers to section info
     }
 
+    seen = set()
     for line in toc_text.split("\n"):
-        line = line.strip()
-        if not line:
-            continue
-
         # Skip non-TOC indicators
-        if "NOT_A_TOC" in line.upper() or "NO_TOC" in line.upper():
-            continue
-
-        # Parse simple >>> format (primary format)
-        if line.startswith(">>>"):
-            chapter_name = line.replace(">>>", "").strip()
-            if chapter_name and chapter_name not in structure["chapters"]:
-                structure["chapters"].append(chapter_name)
+        upper = line.upper()
+        if "NOT_A_TOC" in upper or "NO_TOC" in upper:
             continue
 
-        # Also support MAIN_SECTION format
-        if line.startswith("MAIN_SECTION:"):
-            chapter_name = line.replace("MAIN_SECTION:", "").strip()
-            if chapter_name and chapter_name not in structure["chapters"]:
-                structure["chapters"].append(chapter_name)
-            continue
-
-        # Support CHAPTER format
-        if line.startswith("CHAPTER:"):
-            chapter_name = line.replace("CHAPTER:", "").strip()
-            if chapter_name and chapter_name not in structure["chapters"]:
+        # Chapter lines use the >>> format (primary), MAIN_SECTION: or CHAPTER:
+        match = TOC_LINE_RE.match(line)
+        if match:
+            chapter_name = match.group(1)
+            if chapter_name not in seen:
+                seen.add(chapter_name)
                 structure["chapters"].append(chapter_name)
 
     return structure if structure["chapters"] else None
@@ -371,259 +874,568 @@ def normalize_headings(markdown_text, toc_structure):
         return markdown_text
 
     # Create lowercase chapter names for matching
-    chapter_names_lower = set(ch.lower().strip() for ch in toc_structure["chapters"])
+    chapter_names_lower = frozenset(ch.lower().strip() for ch in toc_structure["chapters"])
 
-    lines = markdown_text.split("\n")
     result_lines = []
+    append = result_lines.append
 
-    for i, line in enumerate(lines):
-        stripped = line.strip()
-        stripped_lower = stripped.lower()
-
+    for line in markdown_text.split("\n"):
         # Check if this is a heading line
         if line.startswith("#"):
             # Count heading level
-            level = 0
-            for char in line:
-                if char == "#":
-                    level += 1
-                else:
-                    break
+            level = len(line) - len(line.lstrip("#"))
 
             # Extract heading text
             heading_text = line[level:].strip()
-            heading_text_lower = heading_text.lower().strip()
 
             # Check if this heading matches a chapter name
-            is_chapter = heading_text_lower in chapter_names_lower
+            is_chapter = heading_text.lower() in chapter_names_lower
 
             if level == 1:  # H1 heading
                 if is_chapter:
                     # Keep as H1 - it's a main chapter
-                    result_lines.append(line)
+                    append(line)
                 else:
                     # Demote to H2 - it's not a main chapter
-                    result_lines.append("## " + heading_text)
+                    append("## " + heading_text)
             elif level == 2:  # H2 heading
                 if is_chapter:
                     # Promote to H1 - it's a main chapter
-                    result_lines.append("# " + heading_text)
+                    append("# " + heading_text)
                 else:
-                    result_lines.append(line)
+                    append(line)
             else:
                 # Keep other heading levels as-is
-                result_lines.append(line)
-        # Check if plain text line matches a chapter name (convert to H1)
-        elif stripped_lower in chapter_names_lower and len(stripped) < 80:
-            result_lines.append("# " + stripped)
+                append(line)
+            continue
+
+        # Check if plain text line matches a chapter name (convert to H1);
+        # long lines and table rows can never match, so skip lowering them
+        stripped = line.strip()
+        if stripped and len(stripped) < 80 and not stripped.startswith("|") and stripped.lower() in chapter_names_lower:
+            append("# " + stripped)
         else:
-            result_lines.append(line)
+            append(line)
 
     return "\n".join(result_lines)
 
 
-async def process_batch_async(clients, images, batch_start, total_pages, semaphore, toc_structure=None, verbose=False):
-    """Process a batch of images concurrently using multiple API clients"""
-    # Convert images to base64 first (this is CPU-bound, done synchronously)
-    base64_images = []
-    for i, image in enumerate(images):
-        page_num = batch_start + i
-        base64_images.append((page_num, image_to_base64(image)))
-
-    # Create prompt based on whether we have TOC structure and model supports it
+def get_page_prompt(toc_structure=None):
+    """Return the page OCR prompt, with heading context when the model supports it and a TOC was found"""
     prompt_with_structure = ACTIVE_OCR_CONFIG.get("prompt_with_structure")
     if toc_structure and prompt_with_structure:
         heading_context = create_heading_context(toc_structure)
-        page_prompt = prompt_with_structure.format(heading_context=heading_context)
-    else:
-        page_prompt = ACTIVE_OCR_CONFIG["prompt"]
-
-    # Create async tasks distributed across clients (round-robin)
-    tasks = []
-    for idx, (page_num, b64_img) in enumerate(base64_images):
-        # Distribute requests across clients
-        client = clients[idx % len(clients)]
+        return prompt_with_structure.format(heading_context=heading_context)
+    return ACTIVE_OCR_CONFIG["prompt"]
 
-        tasks.append(
-            convert_pdf_page_with_ocr_async(client, b64_img, page_num, semaphore, page_prompt, verbose)
-        )
 
-    # Run all tasks concurrently
-    results = await asyncio.gather(*tasks)
+def encode_page_file(path):
+    """Encode a rendered page file as a data: URL and delete it"""
+    try:
+        return image_to_data_url(path)
+    finally:
+        os.unlink(path)
 
-    return results
 
+def convert_pdf_with_ocr(pdf_path, verbose=False, batch_size=None):
+    """Convert a PDF file to markdown using active OCR model with parallel API calls.
 
-def convert_pdf_with_ocr(pdf_path, verbose=False, batch_size=100):
-    """Convert a PDF file to markdown using active OCR model with parallel API calls"""
+    Pages are rendered batch_size at a time (default: OCR_RENDER_BATCH)
+    while earlier pages are already being uploaded. Returns
+    (markdown, complete), where complete is False if any page failed OCR,
+    or None if the conversion failed as a whole.
+    """
+    if batch_size is None:
+        batch_size = OCR_RENDER_BATCH
     try:
         model_name = ACTIVE_OCR_CONFIG["name"]
         two_pass = ACTIVE_OCR_CONFIG["two_pass"]
 
         if verbose:
-            print(f"Using {model_name} ({ACTIVE_OCR_CONFIG['model_id']}) for {pdf_path}", flush=True)
-            print(f"  Settings: DPI={OCR_DPI}, Format={OCR_IMAGE_FORMAT}, MaxTokens={OCR_MAX_TOKENS}", flush=True)
-            print(f"  API keys: {len(API_KEYS)}, Parallel requests: {OCR_CONCURRENCY} concurrent", flush=True)
-            print(f"  Two-pass mode: {'enabled' if two_pass else 'disabled'}", flush=True)
+            logger.info("Using %s (%s) for %s", model_name, ACTIVE_OCR_CONFIG['model_id'], pdf_path)
+            logger.info("  Settings: DPI=%s, Format=%s, MaxTokens=%s", OCR_DPI, OCR_IMAGE_FORMAT, OCR_MAX_TOKENS)
+            logger.info("  API keys: %s, Parallel requests: %s concurrent", len(API_KEYS), OCR_CONCURRENCY)
+            logger.info("  Two-pass mode: %s", 'enabled' if two_pass else 'disabled')
+
+        # Digital PDFs with enough embedded text skip rasterization and the API
+        if OCR_TEXT_LAYER_THRESHOLD and PDFIUM_AVAILABLE:
+            page_texts = extract_pdf_text_layer(pdf_path)
+            if page_texts:
+                chars_per_page = sum(len(text.strip()) for text in page_texts) / len(page_texts)
+                if chars_per_page >= OCR_TEXT_LAYER_THRESHOLD:
+                    if verbose:
+                        logger.info("  Text layer has %.0f chars/page, skipping OCR", chars_per_page)
+                    return join_page_contents([text.strip() or "<!-- No text on this page -->" for text in page_texts]), True
+                if verbose:
+                    logger.info("  Text layer has %.0f chars/page, using OCR", chars_per_page)
 
         # Get total page count without loading all pages
         total_pages = get_pdf_page_count(pdf_path)
+        # Nothing to render or upload; an empty queue bound would also be unbounded
+        if not total_pages:
+            return "", True
 
         if verbose:
-            print(f"PDF has {total_pages} pages (processing in batches of {batch_size} with {OCR_CONCURRENCY} parallel API calls)", flush=True)
+            logger.info("PDF has %s pages (rendering %s at a time with %s parallel API calls)", total_pages, batch_size, OCR_CONCURRENCY)
 
-        # ========== PASS 1: Extract Table of Contents (if model supports it) ==========
-        toc_structure = None
+        # Page markdown in page order (None until a page comes back)
+        page_contents = [None] * total_pages
 
-        if two_pass:
+        # Create async clients and admission control
+        async def run_parallel_conversion():
+            http_client = get_async_http_client()
+            clients = get_async_deepinfra_clients(http_client)
+            # Each API key gets its own limit, so uneven response times can
+            # never push one key past OCR_CONCURRENCY_PER_KEY
+            slots = [(client, AdmissionController(OCR_CONCURRENCY_PER_KEY)) for client in clients]
+            try:
+                toc_structure = await extract_document_structure(slots) if two_pass else None
+                await convert_pages(slots, toc_structure)
+            finally:
+                # Close async clients and their shared pool to avoid event loop warnings
+                for client in clients:
+                    await client.close()
+                await http_client.aclose()
+            return toc_structure
+
+        async def extract_document_structure(slots):
+            """PASS 1: extract the table of contents, sharing the clients used for the pages"""
             toc_pages_to_scan = min(10, total_pages)  # Scan first 10 pages for TOC
 
             if verbose:
-                print(f"Pass 1: Extracting document structure from first {toc_pages_to_scan} pages...", flush=True)
+                logger.info("Pass 1: Extracting document structure from first %s pages...", toc_pages_to_scan)
 
+            toc_structure = None
             try:
                 # Load first few pages to extract TOC
-                toc_images = convert_from_path(
-                    pdf_path,
-                    dpi=OCR_DPI,
-                    first_page=1,
-                    last_page=toc_pages_to_scan
-                )
-
-                # Extract TOC using sync client
-                sync_client = get_deepinfra_client()
-                toc_text = extract_toc_from_pages(sync_client, toc_images, verbose)
+                with tempfile.TemporaryDirectory() as raster_dir:
+                    toc_images = await asyncio.get_running_loop().run_in_executor(
+                        None, rasterize_pdf_pages, pdf_path, 1, toc_pages_to_scan, raster_dir
+                    )
+                    toc_text = await extract_toc_from_pages(slots, toc_images, verbose)
 
                 if toc_text:
                     toc_structure = parse_toc_structure(toc_text)
                     if toc_structure and verbose:
-                        print(f"  Found {len(toc_structure['chapters'])} chapters in document structure", flush=True)
+                        logger.info("  Found %s chapters in document structure", len(toc_structure['chapters']))
                         for ch in toc_structure['chapters'][:5]:
-                            print(f"    - {ch}", flush=True)
+                            logger.info("    - %s", ch)
                         if len(toc_structure['chapters']) > 5:
-                            print(f"    ... and {len(toc_structure['chapters']) - 5} more", flush=True)
+                            logger.info("    ... and %s more", len(toc_structure['chapters']) - 5)
                 elif verbose:
-                    print("  No table of contents found, using default heading rules", flush=True)
-
-                del toc_images
+                    logger.info("  No table of contents found, using default heading rules")
             except Exception as e:
                 if verbose:
-                    print(f"  TOC extraction failed: {str(e)}, using default heading rules", flush=True)
+                    logger.info("  TOC extraction failed: %s, using default heading rules", e)
+            return toc_structure
 
-        # ========== PASS 2: Convert Pages ==========
-        if verbose:
-            if two_pass:
-                print(f"Pass 2: Converting pages with {'structure-aware' if toc_structure else 'default'} heading rules...", flush=True)
-            else:
-                print(f"Converting pages with {model_name}...", flush=True)
+        async def convert_pages(slots, toc_structure):
+            """PASS 2: render, encode and OCR every page"""
+            if verbose:
+                if two_pass:
+                    logger.info("Pass 2: Converting pages with %s heading rules...", 'structure-aware' if toc_structure else 'default')
+                else:
+                    logger.info("Converting pages with %s...", model_name)
 
-        # Results dictionary to maintain page order
-        results_dict = {}
+            page_prompt = get_page_prompt(toc_structure)
+            loop = asyncio.get_running_loop()
 
-        # Create async clients and semaphore
-        async def run_parallel_conversion():
-            clients = get_async_deepinfra_clients()
-            semaphore = asyncio.Semaphore(OCR_CONCURRENCY)
+            # Rendering feeds the API workers through a bounded queue of page
+            # groups, so it only runs a little ahead of the uploads
+            num_groups = -(-total_pages // OCR_PAGE_BATCH)
+            num_workers = min(OCR_CONCURRENCY, num_groups)
+            queue = asyncio.Queue(maxsize=2 * num_workers)
 
-            try:
-                # Process pages in batches to manage memory
-                for batch_start in range(1, total_pages + 1, batch_size):
+            async def render_pages(raster_dir):
+                """Producer: render and encode pages off the event loop, queueing them in groups"""
+                def start_render(batch_start):
                     batch_end = min(batch_start + batch_size - 1, total_pages)
-
                     if verbose:
-                        print(f"Loading pages {batch_start}-{batch_end}...", flush=True)
-
-                    # Load this batch of pages
-                    images = convert_from_path(
-                        pdf_path,
-                        dpi=OCR_DPI,
-                        first_page=batch_start,
-                        last_page=batch_end
+                        logger.info("Loading pages %s-%s...", batch_start, batch_end)
+                    return loop.run_in_executor(
+                        None, rasterize_pdf_pages, pdf_path, batch_start, batch_end, raster_dir
                     )
 
-                    if verbose:
-                        print(f"Processing pages {batch_start}-{batch_end} in parallel...", flush=True)
+                group = []
+                next_render = start_render(1)
+                try:
+                    for batch_start in range(1, total_pages + 1, batch_size):
+                        paths = await next_render
+                        # Render the next chunk while this one is encoded and queued
+                        if batch_start + batch_size <= total_pages:
+                            next_render = start_render(batch_start + batch_size)
+                        # Encode the pages in parallel threads (PIL and file reads
+                        # release the GIL); each is queued as soon as it and the
+                        # pages before it are done, keeping groups consecutive
+                        encodes = [loop.run_in_executor(ENCODE_POOL, encode_page_file, path) for path in paths]
+                        for page_num, encode in enumerate(encodes, batch_start):
+                            group.append((page_num, await encode))
+                            if len(group) == OCR_PAGE_BATCH:
+                                await queue.put(group)
+                                group = []
+                    if group:
+                        await queue.put(group)
+                finally:
+                    # One stop marker per worker
+                    for _ in range(num_workers):
+                        await queue.put(None)
+
+            async def ocr_pages():
+                """Consumer: OCR queued page groups until the producer is done"""
+                while True:
+                    group = await queue.get()
+                    if group is None:
+                        return
+                    if len(group) == 1:
+                        page_num, image_url = group[0]
+                        results = [await convert_pdf_page_with_ocr_async(
+                            slots, image_url, page_num, page_prompt, verbose
+                        )]
+                    else:
+                        results = await convert_pdf_pages_with_ocr_async(
+                            slots, group, page_prompt, verbose
+                        )
+                    for page_num, content in results:
+                        page_contents[page_num - 1] = content
+
+            with tempfile.TemporaryDirectory() as raster_dir:
+                await asyncio.gather(render_pages(raster_dir), *[ocr_pages() for _ in range(num_workers)])
+
+        # Run both passes in one event loop
+        if UVLOOP_AVAILABLE:
+            toc_structure = uvloop.run(run_parallel_conversion())
+        else:
+            toc_structure = asyncio.run(run_parallel_conversion())
 
-                    # Process batch with parallel API calls across multiple clients
-                    # Pass TOC structure for heading context
-                    batch_results = await process_batch_async(
-                        clients, images, batch_start, total_pages, semaphore, toc_structure, verbose
-                    )
+        # Post-process to normalize heading levels based on TOC structure; the
+        # rules work line by line, so each page is done on its own instead of
+        # splitting and re-joining the whole document
+        if toc_structure:
+            if verbose:
+                logger.info("Normalizing heading levels based on document structure...")
+            page_contents = [normalize_headings(content, toc_structure) for content in page_contents]
 
-                    # Store results
-                    for page_num, content in batch_results:
-                        results_dict[page_num] = content
+        # Build markdown output in page order
+        return join_page_contents(page_contents), all(page_contents)
+    except Exception as e:
+        if verbose:
+            logger.info("%s failed for %s: %s", ACTIVE_OCR_CONFIG['name'], pdf_path, e)
+        return None
 
-                    # Clear images from memory
-                    del images
 
-                    if verbose:
-                        print(f"Completed pages {batch_start}-{batch_end} ({batch_end}/{total_pages})", flush=True)
-            finally:
-                # Close async clients to avoid event loop warnings
-                for client in clients:
-                    await client.close()
+def get_markitdown_version():
+    """Return the installed markitdown version (part of the cache key)"""
+    try:
+        return importlib.metadata.version("markitdown")
+    except Exception:
+        return "unknown"
 
-        # Run the async conversion
-        asyncio.run(run_parallel_conversion())
 
-        # Build markdown output in page order
-        markdown_parts = []
-        for page_num in range(1, total_pages + 1):
-            content = results_dict.get(page_num)
-            if content:
-                if total_pages > 1:
-                    markdown_parts.append(f"<!-- Page {page_num} -->\n\n{content}")
-                else:
-                    markdown_parts.append(content)
-            else:
-                markdown_parts.append(f"<!-- Page {page_num}: OCR failed -->")
+def hash_file(file_path):
+    """Return the SHA-256 hex digest of a file's contents"""
+    with open(file_path, 'rb') as f:
+        if hasattr(hashlib, "file_digest"):  # Python 3.11+
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+        return digest.hexdigest()
 
-        final_output = "\n\n---\n\n".join(markdown_parts)
 
-        # Post-process to normalize heading levels based on TOC structure
-        if toc_structure:
-            if verbose:
-                print("Normalizing heading levels based on document structure...", flush=True)
-            final_output = normalize_headings(final_output, toc_structure)
+def get_cache_path(content_digest, ext):
+    """Return the cache file for a content digest, or None when caching is off.
 
-        return final_output
-    except Exception as e:
-        if verbose:
-            print(f"{ACTIVE_OCR_CONFIG['name']} failed for {pdf_path}: {str(e)}", flush=True)
+    The key also covers the file extension and the converter settings the
+    output depends on, so switching OCR model or upgrading markitdown never
+    serves stale results.
+    """
+    if not USE_CACHE or not CACHE_DIR:
         return None
+    if ext == ".pdf" and is_ocr_available():
+        converter = f"ocr:{ACTIVE_OCR_CONFIG['model_id']}:{OCR_DPI}:{OCR_IMAGE_FORMAT}:{OCR_JPEG_QUALITY}:{OCR_MAX_EDGE}:{OCR_MAX_TOKENS}:{OCR_PAGE_BATCH}:{OCR_TEXT_LAYER_THRESHOLD}:{OCR_USE_PDFTOCAIRO}"
+    else:
+        converter = f"markitdown:{get_markitdown_version()}"
+    key = hashlib.sha256(f"{converter}\0{ext}\0{content_digest}".encode("utf-8")).hexdigest()
+    return os.path.join(CACHE_DIR, f"{key}.md")
 
 
-def convert_file_to_markdown_string(input_file_path, verbose=False):
-    """Convert a single file to markdown and return as string"""
-    ext = os.path.splitext(input_file_path)[1].lower()
+def read_cache(cache_path):
+    """Return cached markdown, or None on a cache miss"""
+    if not cache_path:
+        return None
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def write_cache(cache_path, content):
+    """Atomically store markdown in the cache; a failed write only loses the cache entry"""
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning("Could not write cache entry %s: %s", cache_path, e)
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def copy_into_cache(src_path, cache_path):
+    """Atomically store an already written markdown file in the cache"""
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        os.close(fd)
+        shutil.copyfile(src_path, tmp_path)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning("Could not write cache entry %s: %s", cache_path, e)
+        if tmp_path and os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+# Caps markitdown CLI processes alive at once; tree-level and per-folder
+# workers are nested, so without it the count could reach CONVERT_WORKERS**2
+CLI_PROCESS_SLOTS = threading.BoundedSemaphore(CONVERT_WORKERS)
+
+
+# Caps PDFs going through OCR at once, for the same nesting reason; every
+# one renders with OCR_RASTER_THREADS processes and holds its page images
+OCR_PDF_SLOTS = threading.BoundedSemaphore(OCR_PARALLEL_PDFS)
 
-    # Use OCR for PDFs if available
-    if ext == ".pdf" and is_ocr_available():
-        result = convert_pdf_with_ocr(input_file_path, verbose)
-        if result is not None:
-            return result
-        if verbose:
-            print(f"Falling back to markitdown for {input_file_path}")
 
-    # Fall back to markitdown CLI
+def run_cli_process(args, **kwargs):
+    """subprocess.run gated by CLI_PROCESS_SLOTS"""
+    with CLI_PROCESS_SLOTS:
+        return subprocess.run(args, **kwargs)
+
+
+def convert_with_cli_to_file(input_file_path, output_file_path):
+    """Run the markitdown CLI with its stdout piped straight into the output file"""
+    # Force UTF-8 so the bytes match what the in-process path writes
+    env = dict(os.environ, PYTHONIOENCODING="utf-8")
     try:
-        result = subprocess.run(['markitdown', input_file_path],
-                               capture_output=True,
-                               text=True,
-                               check=True)
+        with atomic_write(output_file_path, 'wb') as f:
+            run_cli_process(['markitdown', input_file_path],
+                            stdout=f,
+                            stderr=subprocess.PIPE,
+                            env=env,
+                            check=True)
+    except subprocess.CalledProcessError as e:
+        raise Exception(f"markitdown error: {e.stderr.decode('utf-8', errors='replace')}")
+    except Exception as e:
+        raise Exception(str(e))
+
+
+def convert_with_cli(input_file_path):
+    """Convert a single file with the markitdown CLI and return its output"""
+    try:
+        result = run_cli_process(['markitdown', input_file_path],
+                                 capture_output=True,
+                                 text=True,
+                                 check=True)
         return result.stdout
     except subprocess.CalledProcessError as e:
         raise Exception(f"markitdown error: {e.stderr}")
     except Exception as e:
         raise Exception(str(e))
 
+
+# Helper run by the markitdown CLI's interpreter to convert several files in one
+# process. Each result is framed as "<OK|ERR> <byte length>\n<utf-8 payload>".
+CLI_BATCH_SCRIPT = """
+import sys
+from markitdown import MarkItDown
+md = MarkItDown()
+out = sys.stdout.buffer
+for path in sys.argv[1:]:
+    try:
+        status, text = "OK", md.convert(path).text_content
+    except Exception as e:
+        status, text = "ERR", str(e)
+    data = text.encode("utf-8")
+    out.write(("%s %d\\n" % (status, len(data))).encode("ascii") + data)
+out.flush()
+"""
+
+# Seconds the first queued CLI conversion waits for other workers to join its batch
+CLI_BATCH_WINDOW = 0.02
+
+
+@functools.lru_cache(maxsize=1)
+def get_markitdown_cli_python():
+    """Return the Python interpreter behind the markitdown CLI script, or None"""
+    script = shutil.which('markitdown')
+    if not script:
+        return None
+    try:
+        with open(script, 'rb') as f:
+            shebang = f.readline(512)
+    except OSError:
+        return None
+    if not shebang.startswith(b"#!"):
+        return None  # e.g. a Windows .exe launcher
+    parts = shebang[2:].decode("utf-8", errors="replace").split()
+    if len(parts) >= 2 and os.path.basename(parts[0]) == "env":
+        return shutil.which(parts[1])
+    if parts and "python" in os.path.basename(parts[0]):
+        return parts[0]
+    return None
+
+
+class CliBatcher:
+    """Group markitdown CLI conversions requested concurrently by worker threads.
+
+    The first thread to queue a file becomes the batch leader: it waits
+    CLI_BATCH_WINDOW for other workers to queue theirs, then converts the
+    whole batch in one helper process so interpreter startup and the
+    markitdown import are paid once per batch instead of once per file.
+    """
+
+    def __init__(self, python):
+        self.python = python
+        self.lock = threading.Lock()
+        self.pending = []
+
+    def convert(self, input_file_path):
+        future = Future()
+        with self.lock:
+            self.pending.append((input_file_path, future))
+            is_leader = len(self.pending) == 1
+        if is_leader:
+            time.sleep(CLI_BATCH_WINDOW)
+            with self.lock:
+                batch, self.pending = self.pending, []
+            self.run_batch(batch)
+        return future.result()
+
+    def run_batch(self, batch):
+        try:
+            results = self.convert_batch([path for path, _ in batch])
+        except Exception:
+            results = None
+        for idx, (path, future) in enumerate(batch):
+            if results is not None:
+                status, text = results[idx]
+                if status == "OK":
+                    future.set_result(text)
+                else:
+                    future.set_exception(Exception(f"markitdown error: {text}"))
+                continue
+            # Batch failed as a whole: fall back to one CLI call per file
+            try:
+                future.set_result(convert_with_cli(path))
+            except Exception as e:
+                future.set_exception(e)
+
+    def convert_batch(self, paths):
+        """Run the helper over paths and return one (status, text) per path"""
+        result = run_cli_process([self.python, '-c', CLI_BATCH_SCRIPT, *paths],
+                                 capture_output=True,
+                                 check=True)
+        output = result.stdout
+        results = []
+        pos = 0
+        while pos < len(output):
+            header_end = output.index(b"\n", pos)
+            status, length = output[pos:header_end].decode("ascii").split()
+            start = header_end + 1
+            end = start + int(length)
+            results.append((status, output[start:end].decode("utf-8")))
+            pos = end
+        if len(results) != len(paths):
+            raise ValueError("markitdown batch helper returned an incomplete result")
+        return results
+
+
+_CLI_BATCHER = None
+_CLI_BATCHER_LOCK = threading.Lock()
+
+
+def get_cli_batcher():
+    """Return the shared CliBatcher"""
+    global _CLI_BATCHER
+    with _CLI_BATCHER_LOCK:
+        if _CLI_BATCHER is None:
+            _CLI_BATCHER = CliBatcher(get_markitdown_cli_python())
+        return _CLI_BATCHER
+
+
+def convert_path_to_markdown_string(input_file_path, ext, verbose=False):
+    """Convert a file on disk to markdown, bypassing the cache.
+
+    Returns (content, cacheable); OCR results with failed pages and results
+    that fell back from OCR to markitdown are not cacheable, so a later run
+    retries OCR.
+    """
+    # Use OCR for PDFs if available
+    if ext == ".pdf" and is_ocr_available():
+        with OCR_PDF_SLOTS:
+            result = convert_pdf_with_ocr(input_file_path, verbose)
+        if result is not None:
+            return result
+        if verbose:
+            logger.info("Falling back to markitdown for %s", input_file_path)
+        cacheable = False
+    else:
+        cacheable = True
+
+    # Convert in-process when the markitdown package is importable
+    if MARKITDOWN_AVAILABLE:
+        try:
+            return get_markitdown().convert(input_file_path).text_content, cacheable
+        except Exception as e:
+            raise Exception(f"markitdown error: {str(e)}")
+
+    # Fall back to markitdown CLI, batched with concurrent conversions when possible
+    if get_markitdown_cli_python():
+        return get_cli_batcher().convert(input_file_path), cacheable
+    return convert_with_cli(input_file_path), cacheable
+
+
+def convert_file_to_markdown_string(input_file_path, verbose=False):
+    """Convert a single file to markdown and return (content, complete).
+
+    complete is False for results that are not cached either (see
+    convert_path_to_markdown_string), so the combined output gets reconverted.
+    """
+    ext = os.path.splitext(input_file_path)[1].lower()
+    if ext not in SUPPORTED_EXTENSIONS:
+        return f"<!-- Skipped unsupported file type {ext} -->", True
+
+    cache_path = get_cache_path(hash_file(input_file_path), ext) if USE_CACHE and CACHE_DIR else None
+    content = read_cache(cache_path)
+    if content is not None:
+        if verbose:
+            logger.info("Using cached conversion for %s", input_file_path)
+        return content, True
+
+    content, cacheable = convert_path_to_markdown_string(input_file_path, ext, verbose)
+    if cache_path and cacheable:
+        write_cache(cache_path, content)
+    return content, cacheable
+
+def script_relative_path(path):
+    """argparse type: resolve a relative path against the script folder"""
+    return path if os.path.isabs(path) else os.path.join(_SCRIPT_DIR, path)
+
+def existing_directory(path):
+    """argparse type: a script-relative path that must be an existing directory"""
+    path = script_relative_path(path)
+    if not os.path.isdir(path):
+        raise argparse.ArgumentTypeError(f"input directory '{path}' does not exist")
+    return path
+
 # Add argument parsing
 def parse_arguments():
     parser = argparse.ArgumentParser(description="Convert files to Markdown using Microsoft's MarkItDown tool")
-    parser.add_argument("-i", "--input", dest="input_dir", default="input",
+    parser.add_argument("-i", "--input", dest="input_dir", default="input", type=existing_directory,
                         help="Input directory containing files to convert (default: 'input')")
-    parser.add_argument("-o", "--output", dest="output_dir", default="output",
+    parser.add_argument("-o", "--output", dest="output_dir", default="output", type=script_relative_path,
                         help="Output directory for converted Markdown files (default: 'output')")
     parser.add_argument("-v", "--verbose", action="store_true",
                         help="Enable verbose output")
@@ -632,281 +1444,581 @@ def parse_arguments():
     parser.add_argument("--ocr-model", dest="ocr_model", default="olmocr",
                         choices=list(OCR_MODELS.keys()),
                         help="OCR model to use for PDFs (default: olmocr)")
-    return parser.parse_args()
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Disable the conversion cache and convert every file again")
+    parser.add_argument("--force", action="store_true",
+                        help="Reconvert files even if their output file already exists and is up to date")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Number of files converted in parallel (default: CONVERT_WORKERS or CPU count)")
+    args = parser.parse_args()
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    return args
+
+def is_supported_file(filename, verbose=False):
+    """Check a file's extension against SUPPORTED_EXTENSIONS before converting it"""
+    if os.path.splitext(filename)[1].lower() in SUPPORTED_EXTENSIONS:
+        return True
+    if verbose:
+        logger.info("Skipping unsupported file type: %s", filename)
+    return False
+
+def make_output_tmp(output_file_path):
+    """Create a uniquely named temp file next to an output, so parallel jobs never share one"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(output_file_path) or '.', suffix='.tmp')
+    os.chmod(tmp_path, 0o666 & ~_UMASK)
+    return fd, tmp_path
+
+@contextlib.contextmanager
+def atomic_write(output_file_path, mode='w'):
+    """Write output through a temp file that only replaces the target once complete.
+
+    An interrupted run therefore never leaves a truncated .md behind, which is
+    what lets the next run skip existing outputs (see is_already_converted).
+    """
+    fd, tmp_path = make_output_tmp(output_file_path)
+    encoding = None if 'b' in mode else 'utf-8'
+    f = os.fdopen(fd, mode, encoding=encoding, buffering=OUTPUT_BUFFER_SIZE)
+    try:
+        yield f
+        f.close()
+        os.replace(tmp_path, output_file_path)
+    except BaseException:
+        f.close()
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def get_input_mtime(input_path, entries=None):
+    """Return when a job's input last changed; for a folder (given its entries), its newest visible file or the folder itself"""
+    mtime = os.stat(input_path).st_mtime
+    for entry in entries or ():
+        if entry.name[0] != '.' and entry.is_file():
+            mtime = max(mtime, entry.stat().st_mtime)
+    return mtime
+
+# Sidecar next to an output whose conversion was incomplete (failed OCR
+# pages, a markitdown fallback or a file that failed inside a folder/ZIP)
+INCOMPLETE_SUFFIX = '.incomplete'
+
+def mark_incomplete(output_file_path, incomplete):
+    """Create or remove the sidecar that makes the next run reconvert an output.
+
+    Create it before the output is moved into place and remove it after, so
+    an interrupted run never leaves an incomplete output looking finished.
+    """
+    marker = output_file_path + INCOMPLETE_SUFFIX
+    if incomplete:
+        open(marker, 'w').close()
+    else:
+        try:
+            os.unlink(marker)
+        except FileNotFoundError:
+            pass
+
+def is_already_converted(output_file_path, input_path, verbose=False, entries=None):
+    """Check whether an earlier run already wrote this output (ignored with --force).
+
+    An output older than its input is stale and gets converted again, as is
+    one marked incomplete (see mark_incomplete); the input is only checked
+    when the output exists. entries is the listing of a folder input.
+    """
+    if FORCE:
+        return False
+    try:
+        output_mtime = os.stat(output_file_path).st_mtime
+    except FileNotFoundError:
+        return False
+    if get_input_mtime(input_path, entries) > output_mtime:
+        if verbose:
+            logger.info("Reconverting %s (input changed since it was written)", output_file_path)
+        return False
+    if os.path.exists(output_file_path + INCOMPLETE_SUFFIX):
+        if verbose:
+            logger.info("Reconverting %s (an earlier run left it incomplete)", output_file_path)
+        return False
+    if verbose:
+        logger.info("Skipping %s (already exists, use --force to reconvert)", output_file_path)
+    return True
 
 def convert_file_to_markdown(input_file_path, output_file_path, verbose=False):
     """Convert a single file to markdown using OCR for PDFs or MarkItDown for other formats"""
+    if is_already_converted(output_file_path, input_file_path, verbose):
+        return True
     try:
-        content = convert_file_to_markdown_string(input_file_path, verbose)
+        ext = os.path.splitext(input_file_path)[1].lower()
+        cache_path = get_cache_path(hash_file(input_file_path), ext) if USE_CACHE and CACHE_DIR else None
 
-        # Write the output to the specified file
-        with open(output_file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        if cache_path and os.path.exists(cache_path):
+            # Copy the cached markdown as-is (shutil uses sendfile/fcopyfile where available)
+            fd, tmp_path = make_output_tmp(output_file_path)
+            os.close(fd)
+            try:
+                shutil.copyfile(cache_path, tmp_path)
+                os.replace(tmp_path, output_file_path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+            mark_incomplete(output_file_path, False)
+            if verbose:
+                logger.info("Using cached conversion for %s", input_file_path)
+        elif not MARKITDOWN_AVAILABLE and not (ext == ".pdf" and is_ocr_available()):
+            # markitdown CLI fallback: let the OS write its output straight to disk
+            convert_with_cli_to_file(input_file_path, output_file_path)
+            mark_incomplete(output_file_path, False)
+            if cache_path:
+                copy_into_cache(output_file_path, cache_path)
+        else:
+            content, cacheable = convert_path_to_markdown_string(input_file_path, ext, verbose)
+
+            # Write the output to the specified file
+            with atomic_write(output_file_path) as f:
+                f.write(content)
+                if not cacheable:
+                    mark_incomplete(output_file_path, True)
+            if cacheable:
+                mark_incomplete(output_file_path, False)
+
+            if cache_path and cacheable:
+                write_cache(cache_path, content)
 
         if verbose:
-            print(f"Successfully converted {input_file_path} to {output_file_path}")
+            logger.info("Successfully converted %s to %s", input_file_path, output_file_path)
         return True
     except Exception as e:
-        print(f"Error converting {input_file_path}: {str(e)}")
+        logger.error("Error converting %s: %s", input_file_path, e)
         return False
 
+@functools.lru_cache(maxsize=1)
+def get_fast_tmpdir():
+    """Return a RAM-backed temp directory (/dev/shm) if usable, else None for the system default.
+
+    An explicit TMPDIR always wins so users can still choose where temp files go.
+    """
+    if os.getenv("TMPDIR"):
+        return None
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return None
+
+def spill_to_tempfile(data, suffix, verbose=False):
+    """Write data to a new temp file and return its path.
+
+    /dev/shm is often small (64 MB in containers), so a write that fails
+    there is retried in the system default temp directory.
+    """
+    fast_dir = get_fast_tmpdir()
+    for tmp_dir in ((fast_dir, None) if fast_dir else (None,)):
+        tmp_path = None
+        try:
+            with tempfile.NamedTemporaryFile(suffix=suffix, dir=tmp_dir, delete=False) as tmp:
+                tmp_path = tmp.name
+                tmp.write(data)
+            return tmp_path
+        except OSError as e:
+            if tmp_path and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            if tmp_dir is None:
+                raise
+            if verbose:
+                logger.info("Could not write temp file to %s (%s), using the default temp directory", tmp_dir, e)
+
+def convert_zip_entry_to_markdown_string(zip_ref, info, verbose=False):
+    """Convert a single zip archive entry to markdown without extracting the archive.
+
+    Returns (content, complete) like convert_file_to_markdown_string.
+    """
+    ext = os.path.splitext(info.filename)[1].lower()
+    if ext not in SUPPORTED_EXTENSIONS:
+        return f"<!-- Skipped unsupported file type {ext} -->", True
+    data = zip_ref.read(info)
+
+    cache_path = get_cache_path(hashlib.sha256(data).hexdigest(), ext) if USE_CACHE and CACHE_DIR else None
+    content = read_cache(cache_path)
+    if content is not None:
+        if verbose:
+            logger.info("Using cached conversion for %s", info.filename)
+        return content, True
+
+    # OCR and the markitdown CLI need a path, so spill only this entry to disk
+    if not MARKITDOWN_AVAILABLE or (ext == ".pdf" and is_ocr_available()):
+        tmp_path = spill_to_tempfile(data, ext, verbose)
+        try:
+            content, cacheable = convert_path_to_markdown_string(tmp_path, ext, verbose)
+        finally:
+            os.unlink(tmp_path)
+    else:
+        try:
+            content = get_markitdown().convert_stream(io.BytesIO(data), file_extension=ext).text_content
+            cacheable = True
+        except Exception as e:
+            raise Exception(f"markitdown error: {str(e)}")
+
+    if cache_path and cacheable:
+        write_cache(cache_path, content)
+    return content, cacheable
+
+def _convert_one(label, convert, source, verbose=False):
+    """Convert one file of a combined output and return (section body, complete)"""
+    if verbose:
+        logger.info("Processing %s", label)
+    try:
+        return convert(source, verbose)
+    except Exception as e:
+        return f"Error converting file: {str(e)}", False
+
 def process_zip_file(zip_file_path, output_file_path, verbose=False):
-    """Extract zip file contents and convert to a single markdown file"""
-    temp_dir = tempfile.mkdtemp()
-    
+    """Convert the contents of a zip file to a single markdown file"""
+    if is_already_converted(output_file_path, zip_file_path, verbose):
+        return True
     try:
-        # Extract zip contents to temp directory
-        with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
-            zip_ref.extractall(temp_dir)
-        
-        if verbose:
-            print(f"Extracted {zip_file_path} to temporary directory")
-        
-        # Process each file in the extracted directory
-        all_markdown_content = []
-        file_list = []
-        for root, _, files in os.walk(temp_dir):
-            for filename in files:
-                file_path = os.path.join(root, filename)
-                # Skip hidden files
-                if os.path.basename(file_path).startswith('.'):
-                    continue
-                file_list.append((file_path, os.path.relpath(file_path, temp_dir)))
-        for idx, (file_path, relative_path) in enumerate(file_list):
+        with zipfile.ZipFile(zip_file_path, 'r') as zip_ref, atomic_write(output_file_path) as f:
+            # Skip directories, hidden files and file types markitdown cannot convert
+            entries = [info for info in zip_ref.infolist()
+                       if not info.is_dir() and info.filename.rpartition('/')[2][:1] != '.'
+                       and is_supported_file(info.filename, verbose)]
+
             if verbose:
-                print(f"Processing {relative_path}")
-            try:
-                # Convert file to markdown using the helper
-                content = convert_file_to_markdown_string(file_path, verbose)
-                # Add file header and content
-                all_markdown_content.append(f"# file {idx+1} - {relative_path}\n\n{content}\n\n")
-            except Exception as e:
-                all_markdown_content.append(f"# file {idx+1} - {relative_path}\n\nError converting file: {str(e)}\n\n")
-        
-        # Combine all content and write to output file
-        with open(output_file_path, 'w', encoding='utf-8') as f:
+                logger.info("Found %s files in %s", len(entries), zip_file_path)
+
+            # Identical entries (same CRC, size and extension) are converted once;
+            # unique[i] is the first entry of group i, group_of maps entries to groups
+            groups = {}
+            unique = []
+            group_of = []
+            for info in entries:
+                key = (info.CRC, info.file_size, os.path.splitext(info.filename)[1].lower())
+                if key not in groups:
+                    groups[key] = len(unique)
+                    unique.append(info)
+                elif verbose:
+                    logger.info("Reusing conversion of %s for %s", unique[groups[key]].filename, info.filename)
+                group_of.append(groups[key])
+            remaining = [0] * len(unique)
+            for group in group_of:
+                remaining[group] += 1
+
             f.write(f"# Contents of {os.path.basename(zip_file_path)}\n\n")
-            f.write("".join(all_markdown_content))
+
+            # Convert entries in parallel straight from the archive and write each
+            # section as soon as it is ready; map() yields bodies in archive order
+            convert_entry = functools.partial(convert_zip_entry_to_markdown_string, zip_ref)
+            with ThreadPoolExecutor(max_workers=CONVERT_WORKERS) as executor:
+                bodies = executor.map(_convert_one, [info.filename for info in unique],
+                                      repeat(convert_entry), unique, repeat(verbose))
+                # A group's first entry always comes first, so its body is ready
+                # by the time a duplicate is written; keep it only while needed
+                ready = {}
+                complete = True
+                for idx, (info, group) in enumerate(zip(entries, group_of)):
+                    if group not in ready:
+                        ready[group], entry_complete = next(bodies)
+                        complete = complete and entry_complete
+                    f.write(f"# file {idx+1} - {info.filename}\n\n{ready[group]}\n\n")
+                    remaining[group] -= 1
+                    if not remaining[group]:
+                        del ready[group]
+            if not complete:
+                mark_incomplete(output_file_path, True)
+        if complete:
+            mark_incomplete(output_file_path, False)
         
         if verbose:
-            print(f"Successfully converted zip file {zip_file_path} to {output_file_path}")
+            logger.info("Successfully converted zip file %s to %s", zip_file_path, output_file_path)
         return True
     except Exception as e:
-        print(f"Error processing zip file {zip_file_path}: {str(e)}")
+        logger.error("Error processing zip file %s: %s", zip_file_path, e)
         return False
-    finally:
-        # Clean up temp directory
-        shutil.rmtree(temp_dir)
 
-def combine_files_to_markdown(folder_path, output_file_path, verbose=False):
-    """Convert all files in a folder to a single markdown file"""
+def combine_files_to_markdown(folder_path, output_file_path, verbose=False, entries=None):
+    """Convert all files in a folder to a single markdown file.
+
+    entries is the folder's listing when the tree walk already has it.
+    """
     try:
-        # Process each file in the folder
-        all_markdown_content = []
+        if entries is None:
+            entries = list_directory(folder_path)
+        if is_already_converted(output_file_path, folder_path, verbose, entries):
+            return True
+
         folder_name = os.path.basename(folder_path)
         
-        files = [f for f in os.listdir(folder_path) if os.path.isfile(os.path.join(folder_path, f)) and not f.startswith('.')]
+        files = [entry for entry in entries if entry.name[0] != '.' and entry.is_file()
+                 and is_supported_file(entry.name, verbose)]
         
         if not files:
             if verbose:
-                print(f"No files found in {folder_path}")
+                logger.info("No files found in %s", folder_path)
             return False
         
-        for idx, filename in enumerate(files):
-            file_path = os.path.join(folder_path, filename)
-            
-            if verbose:
-                print(f"Processing {filename} in folder {folder_name}")
-            
-            try:
-                # Convert file to markdown using the helper
-                content = convert_file_to_markdown_string(file_path, verbose)
+        if verbose:
+            logger.info("Processing %s files in folder %s", len(files), folder_name)
 
-                # Add file header and content
-                all_markdown_content.append(f"# file {idx+1} - {filename}\n\n{content}\n\n")
-            except Exception as e:
-                all_markdown_content.append(f"# file {idx+1} - {filename}\n\nError converting file: {str(e)}\n\n")
-            # Add delimiter if not the last file
-            if idx < len(files) - 1:
-                all_markdown_content.append('---\n\n')
-        
-        # Combine all content and write to output file
-        with open(output_file_path, 'w', encoding='utf-8') as f:
+        with atomic_write(output_file_path) as f:
             f.write(f"# Contents of folder: {folder_name}\n\n")
-            f.write("".join(all_markdown_content))
+
+            # Convert files in parallel and write each section as soon as it is
+            # ready; map() yields sections in file order
+            with ThreadPoolExecutor(max_workers=CONVERT_WORKERS) as executor:
+                bodies = executor.map(_convert_one, [entry.name for entry in files],
+                                      repeat(convert_file_to_markdown_string),
+                                      [entry.path for entry in files],
+                                      repeat(verbose))
+                complete = True
+                for idx, (entry, (body, entry_complete)) in enumerate(zip(files, bodies)):
+                    complete = complete and entry_complete
+                    f.write(f"# file {idx+1} - {entry.name}\n\n{body}\n\n")
+                    # Add delimiter if not the last file
+                    if idx < len(files) - 1:
+                        f.write('---\n\n')
+            if not complete:
+                mark_incomplete(output_file_path, True)
+        if complete:
+            mark_incomplete(output_file_path, False)
         
         if verbose:
-            print(f"Successfully combined folder {folder_path} to {output_file_path}")
+            logger.info("Successfully combined folder %s to %s", folder_path, output_file_path)
         return True
     except Exception as e:
-        print(f"Error processing folder {folder_path}: {str(e)}")
+        logger.error("Error processing folder %s: %s", folder_path, e)
         return False
 
-def has_subfolders(folder_path):
-    """Check if a folder contains any subfolders"""
-    for item in os.listdir(folder_path):
-        item_path = os.path.join(folder_path, item)
-        if os.path.isdir(item_path) and not item.startswith('.'):
+# Job kind of a supported file, by extension; anything not listed is a 'file'
+JOB_KINDS = {'.zip': 'zip', '.pdf': 'pdf'}
+
+# Threads listing subfolders during the tree walk
+SCAN_WORKERS = 16
+
+def list_directory(path):
+    """Return the entries of a folder as a list of DirEntry objects"""
+    with os.scandir(path) as it:
+        return list(it)
+
+def has_output_clash(entries):
+    """Check whether two entries of a folder may map to the same output name.
+
+    Errs on the side of True (hidden and unsupported files count too); it only
+    decides whether iter_conversion_jobs sorts the folder.
+    """
+    stems = set()
+    for entry in entries:
+        name = entry.name
+        stem = (name if entry.is_dir() else name.rpartition('.')[0] or name).casefold()
+        if stem in stems:
             return True
+        stems.add(stem)
     return False
 
-def process_directory(input_dir, output_dir, base_input_dir, base_output_dir, current_date, verbose=False):
-    """Recursively process a directory"""
-    # Check if directory has subfolders
-    has_children = has_subfolders(input_dir)
-    
-    if has_children:
-        # Process each subfolder recursively
-        for item in os.listdir(input_dir):
-            item_path = os.path.join(input_dir, item)
-            if os.path.isdir(item_path) and not item.startswith('.'):
-                # Check if this subfolder is a leaf directory
-                if not has_subfolders(item_path):
-                    # This is a leaf directory, skip creating a subfolder and process it directly
-                    folder_name = os.path.basename(item_path)
-                    output_filename = f"{folder_name}_{current_date}.md"
-                    output_file_path = os.path.join(output_dir, output_filename)
-                    
+def claim_output_path(claimed, out_prefix, stem, alt_stem, date_suffix):
+    """Reserve an output path within one output folder, renaming on a clash.
+
+    Different inputs can map to the same output (report.pdf next to report.docx,
+    or a leaf folder report/ next to report.txt). The first one keeps the plain
+    name; later ones fall back to alt_stem, then to a numbered variant. Names are
+    compared case-insensitively so outputs also stay apart on macOS/Windows.
+    Folders with a clash are walked in name order (see has_output_clash), so
+    the same input keeps the plain name on every run.
+    """
+    path = out_prefix + stem + date_suffix
+    if path.casefold() not in claimed:
+        claimed.add(path.casefold())
+        return path
+    renamed = out_prefix + alt_stem + date_suffix
+    n = 2
+    while renamed.casefold() in claimed:
+        renamed = f"{out_prefix}{alt_stem}-{n}{date_suffix}"
+        n += 1
+    claimed.add(renamed.casefold())
+    logger.warning("Output %s is already taken by another input; writing %s instead",
+                   os.path.basename(path), os.path.basename(renamed))
+    return renamed
+
+def iter_conversion_jobs(input_dir, output_dir, date_suffix, verbose=False):
+    """Walk the input tree iteratively and yield (kind, input_path, output_path) jobs.
+
+    kind is 'file', 'pdf', 'zip' or 'leaf_dir'; leaf_dir jobs also carry the
+    folder's listing as a fourth item. The output folder of every non-leaf
+    directory is created before its jobs are yielded, so a job can run as
+    soon as it is produced.
+    """
+    # Bound once: the loop below runs for every entry in the tree
+    makedirs, sep = os.makedirs, os.sep
+    supported, kind_of = SUPPORTED_EXTENSIONS, JOB_KINDS.get
+
+    # Each pending directory is paired with the output folder it maps to and
+    # its listing; the input root maps to the output root itself
+    pending = [(output_dir, list_directory(input_dir))]
+    # Subfolders of a folder are listed in parallel threads as soon as the
+    # folder is reached, which hides opendir latency on network mounts
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as scan_pool:
+        while pending:
+            out_dir, entries = pending.pop()
+            # Listing order differs between filesystems and runs; when outputs
+            # clash, name order decides which input keeps the plain name
+            if has_output_clash(entries):
+                entries.sort(key=lambda entry: entry.name)
+            # A folder is only popped after its parent, so the parent already exists
+            makedirs(out_dir, exist_ok=True)
+            # Paths are absolute here, so output names are plain concatenation
+            out_prefix = out_dir + sep
+            # Output paths handed out for this folder, see claim_output_path
+            claimed = set()
+            # DirEntry caches the file type so is_dir() needs no extra stat;
+            # map() returns the listings in the order of the entries below
+            listings = scan_pool.map(list_directory, [
+                entry.path for entry in entries if entry.name[0] != '.' and entry.is_dir()
+            ])
+
+            for entry in entries:
+                name = entry.name
+
+                # Skip hidden files/directories
+                if name[0] == '.':
                     if verbose:
-                        print(f"Processing nested leaf folder {folder_name} -> {output_filename} (directly in parent)")
-                    
-                    combine_files_to_markdown(item_path, output_file_path, verbose)
+                        logger.info("Skipping hidden item: %s", name)
+                    continue
+
+                if entry.is_dir():
+                    # List every folder exactly once: the listing tells leaves apart
+                    # and is reused when the walk descends into a non-leaf folder
+                    children = next(listings)
+                    if not any(child.name[0] != '.' and child.is_dir() for child in children):
+                        # Leaf folders are combined into one file next to their siblings;
+                        # the listing goes along so the folder is not read again
+                        output_path = claim_output_path(claimed, out_prefix, name, name + '_folder', date_suffix)
+                        yield 'leaf_dir', entry.path, output_path, children
+                    else:
+                        # Non-leaf folders get a matching output subfolder
+                        pending.append((out_prefix + name, children))
                 else:
-                    # Create relative output path for non-leaf folders
-                    rel_path = os.path.relpath(item_path, base_input_dir)
-                    output_subdir = os.path.join(base_output_dir, rel_path)
-                    os.makedirs(output_subdir, exist_ok=True)
-                    
-                    # Process this subfolder
-                    process_directory(item_path, output_subdir, base_input_dir, base_output_dir, current_date, verbose)
-                
-        # Also process individual files in this directory
-        for filename in os.listdir(input_dir):
-            input_file_path = os.path.join(input_dir, filename)
-            
-            # Skip directories and hidden files
-            if os.path.isdir(input_file_path) or filename.startswith('.'):
-                continue
-            
-            # Create output filename with date
-            name_without_ext, ext = os.path.splitext(filename)
-            output_filename = f"{name_without_ext}_{current_date}.md"
-            
-            # Determine relative path for output
-            rel_dir = os.path.relpath(input_dir, base_input_dir)
-            output_subdir = os.path.join(base_output_dir, rel_dir)
-            os.makedirs(output_subdir, exist_ok=True)
-            
-            output_file_path = os.path.join(output_subdir, output_filename)
-            
-            if verbose:
-                print(f"Processing individual file {filename} -> {output_filename}")
-            
-            # Process the file based on extension
-            if ext.lower() == '.zip':
-                process_zip_file(input_file_path, output_file_path, verbose)
-            else:
-                convert_file_to_markdown(input_file_path, output_file_path, verbose)
-                
-    else:
-        # This is a leaf directory, combine all files into one markdown file
-        # Get the parent directory path to place the file one level up
-        parent_dir = os.path.dirname(output_dir)
-        folder_name = os.path.basename(input_dir)
-        output_filename = f"{folder_name}_{current_date}.md"
-        
-        # Place the output file in the parent directory instead of the leaf directory
-        output_file_path = os.path.join(parent_dir, output_filename)
-        
-        if verbose:
-            print(f"Processing leaf folder {folder_name} -> {output_filename} (placing in parent directory)")
-        
-        combine_files_to_markdown(input_dir, output_file_path, verbose)
+                    # Split and lower-case the name once for the support check and
+                    # dispatch; hidden names are gone, so this matches os.path.splitext
+                    name_without_ext, dot, ext = name.rpartition('.')
+                    if not dot:
+                        name_without_ext, ext = name, ''
+                    ext = dot + ext.lower()
+                    if ext not in supported:
+                        if verbose:
+                            logger.info("Skipping unsupported file type: %s", name)
+                        continue
+                    output_path = claim_output_path(claimed, out_prefix, name_without_ext,
+                                                    name_without_ext + '_' + ext[1:], date_suffix)
+                    yield kind_of(ext, 'file'), entry.path, output_path
+
+JOB_HANDLERS = {
+    'file': convert_file_to_markdown,
+    'pdf': convert_file_to_markdown,
+    'zip': process_zip_file,
+    'leaf_dir': combine_files_to_markdown,
+}
+
+def _dispatch(job, verbose=False):
+    """Run a single job produced by iter_conversion_jobs"""
+    kind, input_path, output_path, *extra = job
+    if verbose:
+        label = "leaf folder" if kind == 'leaf_dir' else "file"
+        logger.info("Processing %s %s -> %s", label, os.path.basename(input_path), os.path.basename(output_path))
+    return JOB_HANDLERS[kind](input_path, output_path, verbose, *extra)
 
 def process_all_files(input_dir, output_dir, verbose=False):
-    """Process all files in the input directory"""
-    # Get the current script's directory
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Handle relative paths
-    if not os.path.isabs(input_dir):
-        input_dir = os.path.join(script_dir, input_dir)
-    if not os.path.isabs(output_dir):
-        output_dir = os.path.join(script_dir, output_dir)
-    
-    # Verify input directory exists
-    if not os.path.exists(input_dir):
-        print(f"Error: Input directory '{input_dir}' does not exist.")
-        return False
-    
+    """Process all files in the input directory (both paths absolute, see parse_arguments)"""
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
+
+    # Keep the conversion cache next to the outputs
+    global CACHE_DIR
+    if USE_CACHE:
+        CACHE_DIR = os.path.join(output_dir, ".markitdown_cache")
+        os.makedirs(os.path.join(CACHE_DIR, "ocr"), exist_ok=True)
     
     if verbose:
-        print(f"Input directory: {input_dir}")
-        print(f"Output directory: {output_dir}")
+        logger.info("Input directory: %s", input_dir)
+        logger.info("Output directory: %s", output_dir)
     
-    # Get current date for filename
-    current_date = datetime.now().strftime("%Y-%m-%d")
+    # Build the dated filename suffix once; every output name ends with it
+    date_suffix = f"_{datetime.now().strftime('%Y-%m-%d')}.md"
     
     # Check if input directory is empty
-    if not os.listdir(input_dir):
-        print(f"Warning: Input directory '{input_dir}' is empty.")
-        return False
+    with os.scandir(input_dir) as it:
+        if next(it, None) is None:
+            logger.warning("Warning: Input directory '%s' is empty.", input_dir)
+            return False
     
-    # Process root level items
-    for item in os.listdir(input_dir):
-        item_path = os.path.join(input_dir, item)
-        
-        # Skip hidden files/directories
-        if item.startswith('.'):
-            if verbose:
-                print(f"Skipping hidden item: {item}")
-            continue
-        
-        if os.path.isdir(item_path):
-            # Check if this is a leaf directory (no subfolders)
-            if not has_subfolders(item_path):
-                # This is a leaf directory, process it directly
-                folder_name = os.path.basename(item_path)
-                output_filename = f"{folder_name}_{current_date}.md"
-                output_file_path = os.path.join(output_dir, output_filename)
-                
-                if verbose:
-                    print(f"Processing leaf folder {folder_name} -> {output_filename} (directly in parent)")
-                
-                combine_files_to_markdown(item_path, output_file_path, verbose)
-            else:
-                # Create corresponding output directory for non-leaf folders
-                output_subdir = os.path.join(output_dir, item)
-                os.makedirs(output_subdir, exist_ok=True)
-                
-                # Process this directory
-                process_directory(item_path, output_subdir, input_dir, output_dir, current_date, verbose)
-        else:
-            # Process single file
-            name_without_ext, ext = os.path.splitext(item)
-            output_filename = f"{name_without_ext}_{current_date}.md"
-            output_file_path = os.path.join(output_dir, output_filename)
-            
-            if verbose:
-                print(f"Processing root file {item} -> {output_filename}")
-            
-            # Process the file based on extension
-            if ext.lower() == '.zip':
-                process_zip_file(item_path, output_file_path, verbose)
-            else:
-                convert_file_to_markdown(item_path, output_file_path, verbose)
+    # Jobs from the whole tree share one pool, so a slow subtree no longer
+    # holds back its siblings. Threads rather than processes: the CLI flags
+    # live in module globals that spawned workers would not see, and the
+    # heavy lifting (OCR requests, markitdown subprocesses) releases the GIL.
+    # Jobs are submitted while the tree is still being walked, so the first
+    # conversions start right away; in_flight caps how far the walk runs ahead.
+    in_flight = threading.BoundedSemaphore(4 * CONVERT_WORKERS)
+    progress_lock = threading.Lock()
+    futures = []
+    done = 0
+
+    def job_finished(slot, input_path, future):
+        nonlocal done
+        if slot:
+            slot.release()
+        # Report progress as jobs finish, in whatever order that happens; the
+        # total still grows while the walk is running
+        if verbose:
+            with progress_lock:
+                done += 1
+                logger.info("[%s/%s] Finished %s", done, len(futures), input_path)
+
+    with contextlib.ExitStack() as stack:
+        executor = stack.enter_context(ThreadPoolExecutor(max_workers=CONVERT_WORKERS))
+        # PDFs that go through OCR get their own pool sized to OCR_PDF_SLOTS:
+        # in the shared pool, PDFs waiting for a slot would hold threads that
+        # other files could use. Queued PDFs are cheap, so they do not count
+        # against in_flight and never hold up the walk.
+        executors = {}
+        if is_ocr_available():
+            executors['pdf'] = stack.enter_context(ThreadPoolExecutor(max_workers=OCR_PARALLEL_PDFS))
+        for job in iter_conversion_jobs(input_dir, output_dir, date_suffix, verbose):
+            job_executor = executors.get(job[0])
+            slot = None
+            if job_executor is None:
+                job_executor, slot = executor, in_flight
+                slot.acquire()
+            future = job_executor.submit(_dispatch, job, verbose)
+            futures.append(future)
+            future.add_done_callback(functools.partial(job_finished, slot, job[1]))
+        for future in futures:
+            future.result()
     
     return True
 
 if __name__ == "__main__":
     args = parse_arguments()
 
+    # Messages keep their plain form on stdout; -v shows progress, otherwise
+    # only warnings and errors are printed. Only this script's logger is set
+    # up, so library loggers (httpx logs every request) stay quiet.
+    log_handler = logging.StreamHandler(sys.stdout)
+    log_handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(log_handler)
+    logger.setLevel(logging.INFO if args.verbose else logging.WARNING)
+    logger.propagate = False
+
     # Set OCR flag based on CLI argument
     if args.no_ocr:
         DISABLE_OCR = True
 
+    # Set conversion cache flag based on CLI argument
+    if args.no_cache:
+        USE_CACHE = False
+
+    # Reconvert existing outputs when requested
+    if args.force:
+        FORCE = True
+
+    # Override the worker count (and the matching CLI process limit)
+    if args.jobs:
+        CONVERT_WORKERS = args.jobs
+        CLI_PROCESS_SLOTS = threading.BoundedSemaphore(CONVERT_WORKERS)
+
     # Set active OCR model from CLI argument
     ACTIVE_OCR_CONFIG = OCR_MODELS[args.ocr_model]
     OCR_MAX_TOKENS = int(os.getenv("OCR_MAX_TOKENS", "0")) or ACTIVE_OCR_CONFIG["default_max_tokens"]
@@ -914,19 +2026,8 @@ if __name__ == "__main__":
     # Print OCR status in verbose mode
     if args.verbose:
         if is_ocr_available():
-            print(f"{ACTIVE_OCR_CONFIG['name']} ({ACTIVE_OCR_CONFIG['model_id']}) will be used for PDFs")
+            logger.info("%s (%s) will be used for PDFs", ACTIVE_OCR_CONFIG['name'], ACTIVE_OCR_CONFIG['model_id'])
         else:
-            reasons = []
-            if DISABLE_OCR:
-                reasons.append("disabled via --no-ocr")
-            elif not USE_OCR:
-                reasons.append("USE_OLMOCR=false in .env")
-            elif not DEEPINFRA_API_KEY:
-                reasons.append("DEEPINFRA_API_KEY not set")
-            elif not OPENAI_AVAILABLE:
-                reasons.append("openai package not installed")
-            elif not PDF2IMAGE_AVAILABLE:
-                reasons.append("pdf2image/Pillow not installed")
-            print(f"OCR not available ({', '.join(reasons)}), using markitdown for PDFs")
+            logger.info("OCR not available (%s), using markitdown for PDFs", get_ocr_unavailable_reason())
 
     process_all_files(args.input_dir, args.output_dir, args.verbose)
\ No newline at end of file